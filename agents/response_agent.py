@@ -1,29 +1,74 @@
 import os
 import random
 import re
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 try:
     from groq import Groq
 except Exception:
-    Groq = None
+    Groq = None  # type: ignore[assignment,misc]
+
+try:
+    import httpx
+except Exception:
+    httpx = None  # type: ignore[assignment]
+
+_CLEAN_RE = re.compile(r'[\"*]')
+
+GROQ_BASE_URL = "https://api.groq.com"
+
+# One keep-alive pool shared by every agent so Groq calls skip the TCP/TLS handshake.
+_http_client: Optional["httpx.Client"] = None
+_http_client_lock = threading.Lock()
+
+
+def _shared_http_client() -> Optional["httpx.Client"]:
+    global _http_client
+    if httpx is None:
+        return None
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60),
+                timeout=10.0,
+            )
+        return _http_client
+
+
+def _prewarm(client: "httpx.Client") -> None:
+    """Open the pooled connection to Groq ahead of the first request."""
+    try:
+        client.head(GROQ_BASE_URL)
+    except Exception:
+        pass
 
 
 class ResponseAgent:
     """Generates human-like engagement responses using Groq with graceful fallback."""
 
     GROQ_MODEL = "llama-3.1-8b-instant"
+    # Recent Groq replies are reused per intent so bursts do not each pay a remote call.
+    REPLY_CACHE_TTL_SECONDS = 60
+    REPLIES_PER_INTENT = 3
 
     def __init__(self) -> None:
         api_key = (os.getenv("GROQ_API_KEY") or "").strip()
         self.client: Optional[Groq] = None
-        if api_key and Groq:
+        if api_key and Groq is not None:
+            http_client = _shared_http_client()
             try:
-                self.client = Groq(api_key=api_key)
+                self.client = Groq(api_key=api_key, http_client=http_client)
             except Exception:
                 self.client = None
+            if self.client and http_client is not None:
+                threading.Thread(target=_prewarm, args=(http_client,), daemon=True).start()
 
-        self.intents = {
+        self._reply_cache: Dict[str, List[Tuple[float, str]]] = {}
+        self._reply_cache_lock = threading.Lock()
+
+        self.intents: Dict[int, str] = {
             0: "confused and worried",
             1: "needs explanation",
             2: "suspicious but polite",
@@ -33,8 +78,9 @@ class ResponseAgent:
             6: "expressing concern",
             7: "asking for verification",
         }
+        self._max_depth = max(self.intents)
 
-        self.templates = {
+        self.templates: Dict[str, List[str]] = {
             "confused and worried": [
                 "I'm confused and worried—what does this mean?",
                 "This is worrying. Can you explain what's happening?",
@@ -76,10 +122,28 @@ class ResponseAgent:
                 "Can you prove this request is genuine?",
             ],
         }
+        # Templates pre-bucketed by the cues _template_reply reacts to, so selection is one lookup.
+        self._template_options: Dict[str, Dict[Tuple[bool, bool], Tuple[str, ...]]] = {
+            intent: self._bucket_templates(opts) for intent, opts in self.templates.items()
+        }
+
+    @staticmethod
+    def _bucket_templates(options: List[str]) -> Dict[Tuple[bool, bool], Tuple[str, ...]]:
+        def narrow(opts: Tuple[str, ...], words: Tuple[str, ...]) -> Tuple[str, ...]:
+            return tuple(o for o in opts if any(w in o.lower() for w in words)) or opts
+
+        base = tuple(options)
+        verify = narrow(base, ("verify", "confirm"))
+        return {
+            (False, False): base,
+            (True, False): verify,
+            (False, True): narrow(base, ("step", "guide")),
+            (True, True): narrow(verify, ("step", "guide")),
+        }
 
     def _clean(self, reply: str) -> str:
         reply = (reply or "").split("\n")[0].strip()
-        reply = re.sub(r'[\"*]', "", reply)
+        reply = _CLEAN_RE.sub("", reply)
         words = reply.split()
         if len(words) > 18:
             reply = " ".join(words[:18])
@@ -88,6 +152,25 @@ class ResponseAgent:
     def _groq_reply(self, intent: str) -> str:
         if not self.client:
             return ""
+        now = time.monotonic()
+        with self._reply_cache_lock:
+            fresh = [e for e in self._reply_cache.get(intent, []) if now - e[0] < self.REPLY_CACHE_TTL_SECONDS]
+            self._reply_cache[intent] = fresh
+            # Serve from cache only once there are enough variants that replies do not repeat verbatim.
+            if len(fresh) >= self.REPLIES_PER_INTENT:
+                return random.choice(fresh)[1]
+
+        reply = self._groq_request(intent)
+        if reply:
+            with self._reply_cache_lock:
+                entries = self._reply_cache.setdefault(intent, [])
+                entries.append((now, reply))
+                del entries[: -self.REPLIES_PER_INTENT]
+        return reply
+
+    def _groq_request(self, intent: str) -> str:
+        if self.client is None:
+            return ""
         try:
             resp = self.client.chat.completions.create(
                 model=self.GROQ_MODEL,
@@ -113,16 +196,14 @@ class ResponseAgent:
             return ""
 
     def _template_reply(self, intent: str, last_scammer_text: str) -> str:
-        options = self.templates.get(intent, self.templates["asking for guidance"])
+        buckets = self._template_options.get(intent, self._template_options["asking for guidance"])
         text_l = (last_scammer_text or "").lower()
-        if "verify" in text_l or "confirm" in text_l:
-            options = [o for o in options if "verify" in o.lower() or "confirm" in o.lower()] or options
-        if "upi" in text_l or "pay" in text_l:
-            options = [o for o in options if "step" in o.lower() or "guide" in o.lower()] or options
-        return random.choice(options)
+        asks_verify = "verify" in text_l or "confirm" in text_l
+        asks_payment = "upi" in text_l or "pay" in text_l
+        return random.choice(buckets[(asks_verify, asks_payment)])
 
     def intent_for_depth(self, depth: int) -> str:
-        return self.intents.get(min(depth, max(self.intents)), "asking for guidance")
+        return self.intents.get(min(depth, self._max_depth), "asking for guidance")
 
     def generate_reply(self, is_scam: bool, conversation_depth: int, last_scammer_text: str = "") -> str:
         if not is_scam:
@@ -134,4 +215,3 @@ class ResponseAgent:
         if reply and len(reply) >= 3:
             return reply
         return self._template_reply(intent, last_scammer_text)
-
@@ -1,12 +1,22 @@
+import atexit
+import hashlib
+import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
 import time
+
+import orjson
 from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 from agents.response_agent import ResponseAgent
 from models.scam_detector import ScamDetector
 from utils.callback import send_callback_async
-from utils.intelligence import extract_intelligence
+from utils.intelligence import empty_intelligence, extract_intelligence
 
 # Load .env in development
 try:
@@ -21,39 +31,135 @@ CALLBACK_URL = os.getenv("CALLBACK_URL", "https://hackathon.guvi.in/api/updateHo
 MIN_MESSAGES_FOR_CALLBACK = int(os.getenv("MIN_MESSAGES_FOR_CALLBACK", "4"))
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "5000"))
+LOG_LEVEL = os.getenv("LOGLEVEL", "INFO").upper()
+MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(1024 * 1024)))
+
+
+def _print_banner(groq_enabled: bool) -> None:
+    print("\n" + "=" * 60)
+    print("[HONEYPOT] GUVI Honeypot v2.0 - ML + Agentic Response")
+    print("=" * 60)
+    print(f"[API] Key: {API_KEY}")
+    print(f"[CALLBACK] URL: {CALLBACK_URL}")
+    print(f"[GROQ] Enabled: {'yes' if groq_enabled else 'no (template fallback)'}")
+    print(f"[START] http://{HOST}:{PORT}  POST /api/honeypot")
+    print("=" * 60)
+
+
+def _exec_gunicorn() -> None:
+    """Replace this process with threaded gunicorn workers; returns only if gunicorn is unavailable."""
+    gunicorn = shutil.which("gunicorn")
+    if not gunicorn or os.getenv("HONEYPOT_DEV_SERVER") == "1":
+        return
+    _print_banner(bool((os.getenv("GROQ_API_KEY") or "").strip()))
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    os.execv(
+        gunicorn,
+        [
+            gunicorn,
+            "--chdir",
+            base_dir,
+            "-c",
+            os.path.join(base_dir, "gunicorn_conf.py"),
+            "-b",
+            f"{HOST}:{PORT}",
+            "app:app",
+        ],
+    )
+
+
+# Hand off to gunicorn before the startup work below (log listener, model load, warmup,
+# Groq prewarm): exec would throw it away and each worker does its own.
+if __name__ == "__main__":
+    _exec_gunicorn()
+
+
+def _configure_logging() -> None:
+    """Route log records through a queue so request threads never block on stdout."""
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+
+_configure_logging()
+logger = logging.getLogger("honeypot")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify and request.get_json use it too."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+# Larger bodies are refused before they are read; the handler then answers with the default payload.
+app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+app.json = ORJSONProvider(app)
 CORS(app)
 
 scam_detector = ScamDetector()
+# One throwaway analysis after the background load warms the inference path before traffic.
+threading.Thread(target=scam_detector.analyze, args=("warmup",), name="model-warmup", daemon=True).start()
 response_agent = ResponseAgent()
 
 
+def _json_response(payload: dict, status: int = 200):
+    # Skips the str round trip of app.json.response for the hot honeypot payload.
+    return app.response_class(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
+# Health probes are frequent and constant, so the body and its ETag are built once.
+_HEALTH_BODY = orjson.dumps({"status": "success", "message": "Honeypot service is up and running"})
+_HEALTH_ETAG = hashlib.blake2b(_HEALTH_BODY, digest_size=8).hexdigest()
+_HEALTH_HEADERS = {"ETag": f'"{_HEALTH_ETAG}"', "Cache-Control": "public, max-age=60"}
+
+
 def _service_ok():
-    return jsonify({"status": "success", "message": "Honeypot service is up and running"}), 200
+    if request.if_none_match.contains(_HEALTH_ETAG):
+        return app.response_class(status=304, headers=_HEALTH_HEADERS)
+    return app.response_class(_HEALTH_BODY, status=200, mimetype="application/json", headers=_HEALTH_HEADERS)
+
+
+# Constant parts of the default payload; nested values are shared and never mutated.
+_PAYLOAD_TEMPLATE = {
+    "status": "success",
+    "message": "Processed successfully",
+    "sessionId": "unknown",
+    "scamDetected": False,
+    "detectionConfidence": 0.0,
+    "detectionSignals": {"mlProbability": 0.0, "heuristicScore": 0, "legitimacyScore": 1.0},
+    "engagementMetrics": {"engagementDurationSeconds": 0, "totalMessagesExchanged": 1},
+    "agentReply": "Thanks for reaching out; everything looks fine on your account.",
+    "historyCount": 0,
+    "agentNotes": "",
+    "callbackSent": False,
+    "extractedIntelligence": empty_intelligence(),
+}
+# GET probes and the error fallback always send the unparameterized payload.
+_DEFAULT_BODY = orjson.dumps(_PAYLOAD_TEMPLATE)
 
 
 def _default_payload(session_id: str = "unknown", history_len: int = 0) -> dict:
-    return {
-        "status": "success",
-        "message": "Processed successfully",
-        "sessionId": session_id,
-        "scamDetected": False,
-        "detectionConfidence": 0.0,
-        "detectionSignals": {"mlProbability": 0.0, "heuristicScore": 0, "legitimacyScore": 1.0},
-        "engagementMetrics": {"engagementDurationSeconds": 0, "totalMessagesExchanged": history_len + 1},
-        "agentReply": "Thanks for reaching out; everything looks fine on your account.",
-        "historyCount": history_len,
-        "agentNotes": "",
-        "callbackSent": False,
-        "extractedIntelligence": {
-            "bankAccounts": [],
-            "upiIds": [],
-            "phishingLinks": [],
-            "phoneNumbers": [],
-            "suspiciousKeywords": [],
-        },
-    }
+    payload = _PAYLOAD_TEMPLATE.copy()
+    payload["sessionId"] = session_id
+    payload["engagementMetrics"] = {"engagementDurationSeconds": 0, "totalMessagesExchanged": history_len + 1}
+    payload["historyCount"] = history_len
+    return payload
+
+
+def _default_response():
+    return app.response_class(_DEFAULT_BODY, status=200, mimetype="application/json")
 
 
 @app.route("/", methods=["GET", "HEAD", "OPTIONS", "POST"])
@@ -74,7 +180,7 @@ def honeypot():
     try:
         # Always allow GET/OPTIONS: return full default payload without auth blocking.
         if request.method != "POST":
-            return jsonify(_default_payload()), 200
+            return _default_response()
 
         # Enforce API key for POST as per GUVI contract.
         api_key_header = request.headers.get("x-api-key")
@@ -83,10 +189,11 @@ def honeypot():
             if API_KEY and api_key != API_KEY:
                 return jsonify({"status": "error", "message": "Invalid API key"}), 401
 
-        # Parse body permissively.
+        # Parse body permissively; orjson reads the raw bytes without caching them on the request.
+        raw_body = request.get_data(cache=False)
         try:
-            data = request.get_json(silent=True, force=True) or {}
-        except Exception:
+            data = (orjson.loads(raw_body) if raw_body else {}) or {}
+        except orjson.JSONDecodeError:
             data = {}
 
         # Normalize fields regardless of shape the portal sends.
@@ -125,10 +232,11 @@ def honeypot():
 
         # If no text, return default payload
         if not message_text:
-            return jsonify(_default_payload(session_id or "auto", len(history))), 200
+            return _json_response(_default_payload(session_id or "auto", len(history)))
 
         # Normal flow
-        print(f"\n[HONEYPOT] Session={session_id} Sender={sender} History={len(history)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Session=%s Sender=%s History=%s", session_id, sender, len(history))
 
         start_time = time.time()
         analysis = scam_detector.analyze(message_text, history)
@@ -158,17 +266,13 @@ def honeypot():
             "historyCount": len(history),
             "agentNotes": "",
             "callbackSent": False,
-            "extractedIntelligence": {
-                "bankAccounts": [],
-                "upiIds": [],
-                "phishingLinks": [],
-                "phoneNumbers": [],
-                "suspiciousKeywords": [],
-            },
+            "extractedIntelligence": empty_intelligence(),
         }
 
         if scam_detected:
-            intelligence = extract_intelligence(history, message_text)
+            intelligence = extract_intelligence(
+                history, message_text, session_id=session_id if session_id != "unknown" else None
+            )
             response_payload["extractedIntelligence"] = intelligence
             response_payload["agentNotes"] = (
                 "Scam confirmed via ML probability and heuristic signals. "
@@ -201,19 +305,14 @@ def honeypot():
                 send_callback_async(CALLBACK_URL, callback_payload, session_id=session_id)
                 response_payload["callbackSent"] = True
 
-        return jsonify(response_payload), 200
+        return _json_response(response_payload)
     except Exception as exc:
-        print(f"[ERROR] Fallback handler triggered: {exc}")
-        return jsonify(_default_payload()), 200
+        logger.error("Fallback handler triggered: %s", exc)
+        return _default_response()
 
 
 if __name__ == "__main__":
-    print("\n" + "=" * 60)
-    print("[HONEYPOT] GUVI Honeypot v2.0 - ML + Agentic Response")
-    print("=" * 60)
-    print(f"[API] Key: {API_KEY}")
-    print(f"[CALLBACK] URL: {CALLBACK_URL}")
-    print(f"[GROQ] Enabled: {'yes' if response_agent.client else 'no (template fallback)'}")
-    print(f"[START] http://{HOST}:{PORT}  POST /api/honeypot")
-    print("=" * 60)
+    # The Werkzeug server handles one request at a time; it is only the fallback when
+    # gunicorn is missing (e.g. on Windows) or HONEYPOT_DEV_SERVER=1.
+    _print_banner(response_agent.client is not None)
     app.run(host=HOST, port=PORT, debug=False)
@@ -16,8 +16,8 @@ SAMPLES = [
 def main():
     detector = ScamDetector()
     passed = 0
-    for title, text in SAMPLES:
-        result = detector.analyze(text)
+    results = detector.analyze_batch([text for _, text in SAMPLES])
+    for (title, _), result in zip(SAMPLES, results):
         verdict = "SCAM" if result["is_scam"] else "SAFE"
         expected = "SCAM" if "SCAM" in title else "SAFE"
         ok = verdict == expected
@@ -0,0 +1,15 @@
+"""Gunicorn settings shared by the Procfile and render.yaml."""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Each worker loads its own model copy, so cap the default to fit small instances.
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+
+# Threads let a worker keep serving while another request waits on Groq or the callback.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+keepalive = 75
+timeout = 60
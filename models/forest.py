@@ -0,0 +1,64 @@
+from typing import Dict
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+
+class FlatForest:
+    """RandomForest scam probabilities from flattened node arrays, evaluated with NumPy.
+
+    Every tree's nodes are concatenated into one set of arrays. Leaves point at
+    themselves, so walking all trees for all rows is ``max_depth`` rounds of gathers
+    and skips sklearn's per-call validation and per-tree dispatch.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"])
+
+    @staticmethod
+    def flatten(model: RandomForestClassifier) -> Dict[str, np.ndarray]:
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        positive = list(model.classes_).index(1)
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            counts = tree.value[:, 0, :]
+            values.append(counts[:, positive] / counts.sum(axis=1))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+        return {
+            "feature": np.concatenate(features).astype(np.int32),
+            "threshold": np.concatenate(thresholds).astype(np.float64),
+            "left": np.concatenate(lefts).astype(np.int32),
+            "right": np.concatenate(rights).astype(np.int32),
+            # Leaf probabilities only feed a mean, so float32 is plenty; thresholds stay
+            # float64 so every split decision matches sklearn exactly.
+            "value": np.concatenate(values).astype(np.float32),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "depth": np.asarray(depth, dtype=np.int32),
+        }
+
+    def predict_positive(self, x: np.ndarray) -> np.ndarray:
+        """Mean class-1 probability over all trees for each row of dense ``x``."""
+        # The forest compares float32 inputs against float64 thresholds, as sklearn does.
+        x = np.asarray(x, dtype=np.float32)
+        rows = np.arange(x.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (x.shape[0], self.roots.shape[0]))
+        for _ in range(self.depth):
+            go_left = x[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1, dtype=np.float64)
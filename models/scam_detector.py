@@ -1,76 +1,113 @@
 import os
 import re
+import threading
+from collections import OrderedDict
+
 import joblib
 import numpy as np
+import scipy.sparse as sp
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional, Tuple
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from models.forest import FlatForest
+from utils.batcher import MicroBatcher
+from utils.keywords import KeywordMatcher
+
+try:
+    import onnxruntime
+except Exception:
+    onnxruntime = None
+
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except Exception:
+    convert_sklearn = None
+    FloatTensorType = None
+
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
+# Serving artifact: the vectorizer and the flattened forest arrays.
 MODEL_FILE = ARTIFACTS_DIR / "scam_model.joblib"
-MODEL_VERSION = "v3"
+# The fitted RandomForest itself, read only to build the ONNX export.
+ESTIMATOR_FILE = ARTIFACTS_DIR / "scam_estimator.joblib"
+MODEL_VERSION = "v5"
+# Optional ONNX export of the forest, rebuilt from ESTIMATOR_FILE when missing.
+ONNX_FILE = ARTIFACTS_DIR / f"scam_model_{MODEL_VERSION}.onnx"
+# Scam scripts repeat across sessions; keep the most recent analyses keyed by message + recent turns.
+ANALYSIS_CACHE_SIZE = 8192
+# Longer inputs are analyzed but not cached, so a full cache stays in the tens of MB.
+ANALYSIS_CACHE_MAX_CHARS = 4096
+CUSTOM_FEATURE_COUNT = 11
+# Opt-in micro-batching of model calls across concurrent requests (0 disables it).
+BATCH_WINDOW_MS = float(os.getenv("SCAM_BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(os.getenv("SCAM_BATCH_MAX_SIZE", "32"))
+# How long a request waits for the background model load before scoring on heuristics alone.
+MODEL_READY_TIMEOUT_SECONDS = float(os.getenv("SCAM_MODEL_READY_TIMEOUT", "30"))
+
+# Precompiled patterns used on every request.
+_URL_RE = re.compile(r"https?://")
+_PHONE_RE = re.compile(r"\+91\d{10}")
+_EMAIL_RE = re.compile(r"\b[a-z0-9._-]+@[a-z0-9.-]+\b")
+
+# Hard safety overrides for clearly legitimate bank notifications.
+_SAFE_PATTERNS = (
+    "scheduled maintenance",
+    "maintenance",
+    "debited",
+    "credited",
+    "available balance",
+    "avl bal",
+)
+_SAFE_PATTERNS_RE = re.compile("|".join(map(re.escape, _SAFE_PATTERNS)))
+
+# Whitelist-style legitimate patterns to avoid false positives on bank alerts/maintenance.
+_LEGIT_PATTERNS = (
+    r"inr\s+[\d,.]+\s+(debited|credited)\s+from\s+a/c",
+    r"credit of rs",
+    r"credited to your account",
+    r"your otp is \d{4,6}",
+    r"scheduled maintenance",
+    r"available balance",
+    r"monthly account statement",
+    r"emi .* auto-debited",
+)
+_LEGIT_RE = re.compile("|".join(f"(?:{p})" for p in _LEGIT_PATTERNS))
 
 
 def _ensure_artifacts_dir() -> None:
     ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _contains(patterns: List[str], text: str) -> bool:
-    return any(p in text for p in patterns)
-
-
-def _heuristic_score(text: str) -> int:
-    """Simple signal scoring kept for interpretability and guarding the ML output."""
-    text_l = text.lower()
-    score = 0
-    if _contains(
-        [
-            "urgent",
-            "immediately",
-            "within",
-            "blocked",
-            "suspended",
-            "deactivated",
-            "limited",
-            "unusual activity",
-            "suspicious",
-            "avoid",
-        ],
-        text_l,
-    ):
-        score += 2
-    if _contains(
-        ["bank", "account", "payment", "transfer", "refund", "upi", "credit", "debit"],
-        text_l,
-    ):
-        score += 2
-    if _contains(
-        ["restore", "reactivate", "verify", "confirm", "submit", "update", "click", "login", "respond"],
-        text_l,
-    ):
-        score += 1
-    if _contains(["otp", "pin", "upi pin"], text_l):
-        score += 2
-    if _contains(["prize", "reward", "lottery", "cashback", "free", "offer", "won", "bonus"], text_l):
-        score += 3
-    if re.search(r"https?://", text_l):
-        score += 3
-    return score
-
-
-def _custom_feature_row(text: str) -> List[float]:
-    """Compute 11 lightweight custom features to complement TF-IDF."""
-    text_l = text.lower()
-
-    urgency_words = ["urgent", "immediately", "asap", "within", "hurry", "now", "today"]
-    financial_words = ["bank", "account", "payment", "transfer", "refund", "upi", "credit", "debit"]
-    action_words = ["restore", "reactivate", "verify", "confirm", "submit", "update", "click", "login", "respond"]
-    reward_words = ["prize", "reward", "lottery", "cashback", "free", "offer", "won", "bonus"]
-    threat_words = ["blocked", "suspended", "deactivated", "limited", "closing", "blacklist", "otp", "pin"]
-    legitimacy_words = [
+# Keyword categories for the heuristic score and the custom features. Every category is
+# answered from one matcher pass over the text (see _keyword_flags).
+_URGENCY_WORDS = frozenset(
+    {
+        "urgent",
+        "immediately",
+        "within",
+        "blocked",
+        "suspended",
+        "deactivated",
+        "limited",
+        "unusual activity",
+        "suspicious",
+        "avoid",
+    }
+)
+_FINANCIAL_WORDS = frozenset({"bank", "account", "payment", "transfer", "refund", "upi", "credit", "debit"})
+_ACTION_WORDS = frozenset(
+    {"restore", "reactivate", "verify", "confirm", "submit", "update", "click", "login", "respond"}
+)
+_CREDENTIAL_WORDS = frozenset({"otp", "pin", "upi pin"})
+_REWARD_WORDS = frozenset({"prize", "reward", "lottery", "cashback", "free", "offer", "won", "bonus"})
+_FEATURE_URGENCY_WORDS = frozenset({"urgent", "immediately", "asap", "within", "hurry", "now", "today"})
+_THREAT_WORDS = frozenset({"blocked", "suspended", "deactivated", "limited", "closing", "blacklist", "otp", "pin"})
+_LEGITIMACY_WORDS = frozenset(
+    {
         "otp",
         "one time password",
         "debited",
@@ -83,39 +120,175 @@ def _custom_feature_row(text: str) -> List[float]:
         "available balance",
         "avl bal",
         "emi",
-    ]
+    }
+)
+
+# One bit per category; each legitimacy word gets its own bit so matches can be counted.
+_URGENCY = 1 << 0
+_FINANCIAL = 1 << 1
+_ACTION = 1 << 2
+_CREDENTIAL = 1 << 3
+_REWARD = 1 << 4
+_FEATURE_URGENCY = 1 << 5
+_THREAT = 1 << 6
+_LEGITIMACY_SHIFT = 7
+
+
+def _build_keyword_flags() -> Dict[str, int]:
+    flags: Dict[str, int] = {}
+    for words, bit in (
+        (_URGENCY_WORDS, _URGENCY),
+        (_FINANCIAL_WORDS, _FINANCIAL),
+        (_ACTION_WORDS, _ACTION),
+        (_CREDENTIAL_WORDS, _CREDENTIAL),
+        (_REWARD_WORDS, _REWARD),
+        (_FEATURE_URGENCY_WORDS, _FEATURE_URGENCY),
+        (_THREAT_WORDS, _THREAT),
+    ):
+        for word in words:
+            flags[word] = flags.get(word, 0) | bit
+    for i, word in enumerate(sorted(_LEGITIMACY_WORDS)):
+        flags[word] = flags.get(word, 0) | (1 << (_LEGITIMACY_SHIFT + i))
+    return flags
+
+
+_KEYWORD_FLAGS = _build_keyword_flags()
+_KEYWORD_MATCHER = KeywordMatcher(sorted(_KEYWORD_FLAGS), _KEYWORD_FLAGS)
+
+
+def _keyword_flags(text_l: str) -> int:
+    return _KEYWORD_MATCHER.find_flags(text_l)
+
 
-    def _binary(words: List[str]) -> int:
-        return int(_contains(words, text_l))
-
-    urgency = _binary(urgency_words)
-    financial = _binary(financial_words)
-    action = _binary(action_words)
-    reward = _binary(reward_words)
-    threat = _binary(threat_words)
-    link_present = int(bool(re.search(r"https?://", text_l)))
-    phone_present = int(bool(re.search(r"\+91\d{10}", text_l)))
-    upi_or_email_present = int(bool(re.search(r"\b[a-z0-9._-]+@[a-z0-9.-]+\b", text_l)))
-
-    word_count_norm = min(len(text.split()) / 50.0, 1.0)
-    char_count_norm = min(len(text) / 280.0, 1.0)
-    present = sum(1 for w in legitimacy_words if w in text_l)
+def _heuristic_score(text: str, text_l: Optional[str] = None, flags: Optional[int] = None) -> int:
+    """Simple signal scoring kept for interpretability and guarding the ML output."""
+    text_l = text.lower() if text_l is None else text_l
+    flags = _keyword_flags(text_l) if flags is None else flags
+    score = 0
+    if flags & _URGENCY:
+        score += 2
+    if flags & _FINANCIAL:
+        score += 2
+    if flags & _ACTION:
+        score += 1
+    if flags & _CREDENTIAL:
+        score += 2
+    if flags & _REWARD:
+        score += 3
+    if "http" in text_l and _URL_RE.search(text_l):
+        score += 3
+    return score
+
+
+def _legitimacy_score(flags: int) -> float:
+    present = (flags >> _LEGITIMACY_SHIFT).bit_count()
     # Make legitimacy resilient: one legit term yields >=0.25
-    legitimacy_score = round(min(1.0, present / 3.0), 3)
-
-    return [
-        urgency,
-        financial,
-        action,
-        reward,
-        threat,
-        link_present,
-        phone_present,
-        upi_or_email_present,
-        word_count_norm,
-        char_count_norm,
-        legitimacy_score,
-    ]
+    return round(min(1.0, present / 3.0), 3)
+
+
+def _custom_feature_row(
+    text: str, text_l: Optional[str] = None, flags: Optional[int] = None, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Compute 11 lightweight custom features to complement TF-IDF, as a float32 row.
+
+    Writes into ``out`` when given (e.g. a row of a training matrix) and returns it.
+    """
+    text_l = text.lower() if text_l is None else text_l
+    flags = _keyword_flags(text_l) if flags is None else flags
+    if out is None:
+        out = np.empty(CUSTOM_FEATURE_COUNT, dtype=np.float32)
+
+    out[:] = (
+        bool(flags & _FEATURE_URGENCY),
+        bool(flags & _FINANCIAL),
+        bool(flags & _ACTION),
+        bool(flags & _REWARD),
+        bool(flags & _THREAT),
+        # Cheap substring checks skip the regexes on the common negative path.
+        "http" in text_l and _URL_RE.search(text_l) is not None,
+        "+91" in text_l and _PHONE_RE.search(text_l) is not None,
+        "@" in text_l and _EMAIL_RE.search(text_l) is not None,
+        min(len(text.split()) / 50.0, 1.0),
+        min(len(text) / 280.0, 1.0),
+        _legitimacy_score(flags),
+    )
+    return out
+
+
+def _custom_feature_matrix(texts: List[str]) -> np.ndarray:
+    """Stack the custom feature rows for many texts into one float32 matrix."""
+    matrix = np.empty((len(texts), CUSTOM_FEATURE_COUNT), dtype=np.float32)
+    for i, text in enumerate(texts):
+        text_l = text.lower()
+        _custom_feature_row(text, text_l, _keyword_flags(text_l), out=matrix[i])
+    return matrix
+
+
+def _combine(message_text: str, recent: Tuple[str, ...]) -> str:
+    """The text scored for a message: the message followed by the recent scammer turns."""
+    # strip() hands back the same string when there is no edge whitespace, so the common
+    # case allocates once.
+    stripped = message_text.strip()
+    return " ".join((stripped,) + recent).strip() if recent else stripped
+
+
+def _safe_notification_result(combined_text: str, text_l: str) -> Optional[Dict]:
+    """Fixed verdict for texts matching the hard safety overrides, else None."""
+    if not _SAFE_PATTERNS_RE.search(text_l):
+        return None
+    legitimacy_score = 1.0 if "maintenance" in text_l else 0.667
+    return {
+        "is_scam": False,
+        "confidence": 0.05,
+        "ml_probability": 0.0,
+        "heuristic_score": 0,
+        "legitimacy_score": legitimacy_score,
+        "combined_text_used": combined_text,
+    }
+
+
+def _verdict(
+    combined_text: str, ml_proba: float, heuristic: int, legitimacy_score: float, legit_override: bool
+) -> Dict:
+    """Combine the ML probability with the heuristic and legitimacy guards."""
+    scam_confidence = max(ml_proba, heuristic / 6.0)
+    scam_confidence = scam_confidence * (1 - (legitimacy_score * 0.4))
+    scam_confidence = round(min(max(scam_confidence, 0.0), 0.99), 3)
+
+    safe_override = (legitimacy_score >= 0.3 and heuristic <= 1) or legit_override
+
+    is_scam = (
+        not safe_override
+        and (ml_proba >= 0.55 or (ml_proba >= 0.45 and heuristic >= 3))
+        and legitimacy_score < 0.7
+    )
+
+    if safe_override:
+        scam_confidence = round(min(scam_confidence, 0.15), 3)
+        is_scam = False
+
+    # Extra guard: low-signal messages (no heuristics) need higher ML probability to be scams.
+    if heuristic <= 1 and ml_proba < 0.65:
+        is_scam = False
+        scam_confidence = round(min(scam_confidence, 0.2), 3)
+
+    return {
+        "is_scam": bool(is_scam),
+        "confidence": scam_confidence,
+        "ml_probability": round(ml_proba, 3),
+        "heuristic_score": heuristic,
+        "legitimacy_score": legitimacy_score,
+        "combined_text_used": combined_text,
+    }
+
+
+def _load_estimator() -> Optional[RandomForestClassifier]:
+    """The fitted RandomForest, read on demand for the ONNX export and then dropped."""
+    try:
+        artifact = joblib.load(ESTIMATOR_FILE)
+    except Exception:
+        return None
+    return artifact["model"] if artifact.get("version") == MODEL_VERSION else None
 
 
 def _training_data() -> Tuple[List[str], List[int]]:
@@ -156,17 +329,36 @@ class ScamDetector:
 
     def __init__(self) -> None:
         self.vectorizer: TfidfVectorizer | None = None
-        self.model: RandomForestClassifier | None = None
+        self._forest: FlatForest | None = None
+        self._onnx_session = None
+        self._batcher: MicroBatcher | None = None
+        if BATCH_WINDOW_MS > 0:
+            self._batcher = MicroBatcher(self._predict_many, BATCH_WINDOW_MS / 1000.0, BATCH_MAX_SIZE)
+        self._cache: "OrderedDict[Tuple[str, Tuple[str, ...]], Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._ready = threading.Event()
         _ensure_artifacts_dir()
-        self._load_or_train()
+        # Loading (or training) runs beside app startup; analyze waits on _ready.
+        threading.Thread(target=self._background_load, name="model-load", daemon=True).start()
+
+    def _background_load(self) -> None:
+        try:
+            self._load_or_train()
+        finally:
+            self._ready.set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model is loaded; returns False if ``timeout`` expires first."""
+        return self._ready.wait(timeout)
 
     def _load_or_train(self) -> None:
         if MODEL_FILE.exists():
             try:
-                artifact = joblib.load(MODEL_FILE)
-                if artifact.get("version") == MODEL_VERSION:
+                # Memory-mapped arrays are shared through the page cache by all workers.
+                artifact = joblib.load(MODEL_FILE, mmap_mode="r")
+                if artifact.get("version") == MODEL_VERSION and "forest" in artifact:
                     self.vectorizer = artifact["vectorizer"]
-                    self.model = artifact["model"]
+                    self._prepare_inference(artifact["forest"])
                     return
             except Exception:
                 pass
@@ -177,105 +369,201 @@ class ScamDetector:
         self.vectorizer = TfidfVectorizer(
             max_features=100,
             ngram_range=(1, 2),
-            lowercase=True,
+            # Callers pass text that is already lowered for the keyword checks.
+            lowercase=False,
             stop_words="english",
         )
-        tfidf_features = self.vectorizer.fit_transform(texts).toarray()
-        custom_features = np.array([_custom_feature_row(t) for t in texts])
-        training_matrix = np.hstack([tfidf_features, custom_features])
+        tfidf_features = self.vectorizer.fit_transform([t.lower() for t in texts])
+        custom_features = sp.csr_matrix(_custom_feature_matrix(texts))
+        training_matrix = sp.hstack([tfidf_features, custom_features], format="csr")
 
-        self.model = RandomForestClassifier(
+        model = RandomForestClassifier(
             n_estimators=120,
             max_depth=10,
             random_state=42,
         )
-        self.model.fit(training_matrix, labels)
-
-        joblib.dump({"vectorizer": self.vectorizer, "model": self.model, "version": MODEL_VERSION}, MODEL_FILE)
-
-    def _vectorize(self, text: str) -> np.ndarray:
+        model.fit(training_matrix, labels)
+
+        # Serving only needs the flattened arrays; the estimator goes to its own file so
+        # workers never unpickle sklearn's trees.
+        forest = FlatForest.flatten(model)
+        joblib.dump(
+            {"vectorizer": self.vectorizer, "forest": forest, "version": MODEL_VERSION},
+            MODEL_FILE,
+            compress=0,
+        )
+        joblib.dump({"model": model, "version": MODEL_VERSION}, ESTIMATOR_FILE)
+        self._export_onnx(model)
+        self._prepare_inference(forest)
+        self.cache_clear()
+
+    def _prepare_inference(self, forest: Dict[str, np.ndarray]) -> None:
+        self._forest = FlatForest(forest)
+        self._load_onnx()
+
+    def _export_onnx(self, model: Optional[RandomForestClassifier] = None) -> None:
+        if convert_sklearn is None:
+            return
+        model = model if model is not None else _load_estimator()
+        if model is None:
+            return
+        # Workers may export concurrently; each writes its own temp file and renames it
+        # into place so no process ever opens a half-written model.
+        tmp = ONNX_FILE.with_name(f"{ONNX_FILE.name}.{os.getpid()}.tmp")
+        try:
+            onx = convert_sklearn(
+                model,
+                initial_types=[("input", FloatTensorType([None, model.n_features_in_]))],
+                options={id(model): {"zipmap": False}},
+            )
+            tmp.write_bytes(onx.SerializeToString())
+            os.replace(tmp, ONNX_FILE)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+
+    def _load_onnx(self) -> None:
+        """Serve the forest through ONNX Runtime when it is installed; FlatForest stays the fallback."""
+        self._onnx_session = None
+        if onnxruntime is None:
+            return
+        if not ONNX_FILE.exists():
+            self._export_onnx()
+        if not ONNX_FILE.exists():
+            return
+        try:
+            self._onnx_session = onnxruntime.InferenceSession(str(ONNX_FILE), providers=["CPUExecutionProvider"])
+        except Exception:
+            self._onnx_session = None
+
+    def _predict_many(self, features: sp.csr_matrix) -> np.ndarray:
+        """Scam probability for every row of ``features``."""
+        if self._onnx_session is not None:
+            dense = features.toarray().astype(np.float32, copy=False)
+            proba = self._onnx_session.run(None, {"input": dense})[1][:, 1].astype(np.float64)
+            # ONNX Runtime averages the trees in float32, so a probability sitting exactly on
+            # a verdict threshold (e.g. 54/120 = 0.45) comes back a hair below it.
+            return np.round(proba, 6)
+        if self._forest is None:
+            raise RuntimeError("Model not initialized")
+        return self._forest.predict_positive(features.toarray())
+
+    def _predict_proba(self, features: sp.csr_matrix) -> float:
+        if self._batcher is not None:
+            return self._batcher.submit(features)
+        return float(self._predict_many(features)[0])
+
+    def _vectorize(
+        self, text: str, custom_row: Optional[np.ndarray] = None, text_l: Optional[str] = None
+    ) -> sp.csr_matrix:
+        # TF-IDF stays sparse; the forest casts to float32 anyway, so the custom block starts there.
         if not self.vectorizer:
             raise RuntimeError("Vectorizer not initialized")
-        tfidf_vec = self.vectorizer.transform([text]).toarray()
-        custom_vec = np.array([_custom_feature_row(text)])
-        return np.hstack([tfidf_vec, custom_vec])
+        text_l = text.lower() if text_l is None else text_l
+        tfidf_vec = self.vectorizer.transform([text_l])
+        row = _custom_feature_row(text, text_l) if custom_row is None else custom_row
+        custom_vec = sp.csr_matrix(row.reshape(1, -1))
+        return sp.hstack([tfidf_vec, custom_vec], format="csr")
 
     def analyze(self, message_text: str, history: Optional[List[Dict]] = None) -> Dict:
         """Return detailed analysis with ML probability, heuristics, and legitimacy guard."""
         history = history or []
-        last_scammer_msgs = " ".join(
-            m.get("text", "") for m in history[-3:] if m.get("sender") == "scammer"
-        )
-        combined_text = f"{message_text.strip()} {last_scammer_msgs}".strip()
-        text_l = combined_text.lower()
-
-        # Hard safety overrides for clearly legitimate bank notifications.
-        safe_patterns = [
-            "scheduled maintenance",
-            "maintenance",
-            "debited",
-            "credited",
-            "available balance",
-            "avl bal",
+        recent = tuple(m.get("text", "") for m in history[-3:] if m.get("sender") == "scammer")
+
+        # The verdict depends only on the message and the recent scammer turns, so repeats
+        # are served from the cache before any model work.
+        key = (message_text, recent)
+        cacheable = len(message_text) + sum(map(len, recent)) <= ANALYSIS_CACHE_MAX_CHARS
+        cached: Optional[Dict] = None
+        if cacheable:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+        if cached is not None:
+            # Entries leave out the joined text so each one stays small; rebuild it per hit.
+            return {**cached, "combined_text_used": _combine(message_text, recent)}
+
+        combined_text = _combine(message_text, recent)
+        model_ready = self._ready.is_set()
+        result = self._analyze_combined(combined_text)
+        if not model_ready or not cacheable:
+            # Oversized inputs are never cached, nor verdicts scored without the model.
+            return result
+        entry = {field: value for field, value in result.items() if field != "combined_text_used"}
+        with self._cache_lock:
+            self._cache[key] = entry
+            if len(self._cache) > ANALYSIS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+    def cache_clear(self) -> None:
+        """Drop all cached analyses, e.g. after retraining the model."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze standalone messages together with one vectorizer pass and one model call.
+
+        Each result matches ``analyze(text)`` without history; results are not cached.
+        """
+        combined = [text.strip() for text in texts]
+        lowered = [text.lower() for text in combined]
+        results: List[Optional[Dict]] = [
+            _safe_notification_result(text, text_l) for text, text_l in zip(combined, lowered)
         ]
-        if any(p in text_l for p in safe_patterns):
-            legitimacy_score = 1.0 if "maintenance" in text_l else 0.667
-            return {
-                "is_scam": False,
-                "confidence": 0.05,
-                "ml_probability": 0.0,
-                "heuristic_score": 0,
-                "legitimacy_score": legitimacy_score,
-                "combined_text_used": combined_text,
-            }
-
-        heuristic = _heuristic_score(combined_text)
-        legitimacy_score = _custom_feature_row(combined_text)[-1]
-
-        if not self.model or not self.vectorizer:
-            self._load_or_train()
-        features = self._vectorize(combined_text)
-        ml_proba = float(self.model.predict_proba(features)[0][1])
-
-        # Whitelist-style legitimate patterns to avoid false positives on bank alerts/maintenance.
-        legit_patterns = [
-            r"inr\s+[\d,.]+\s+(debited|credited)\s+from\s+a/c",
-            r"credit of rs",
-            r"credited to your account",
-            r"your otp is \d{4,6}",
-            r"scheduled maintenance",
-            r"available balance",
-            r"monthly account statement",
-            r"emi .* auto-debited",
-        ]
-        legit_override = any(re.search(p, combined_text.lower()) for p in legit_patterns)
-
-        scam_confidence = max(ml_proba, heuristic / 6.0)
-        scam_confidence = scam_confidence * (1 - (legitimacy_score * 0.4))
-        scam_confidence = round(min(max(scam_confidence, 0.0), 0.99), 3)
 
-        safe_override = (legitimacy_score >= 0.3 and heuristic <= 1) or legit_override
-
-        is_scam = (
-            not safe_override
-            and (ml_proba >= 0.55 or (ml_proba >= 0.45 and heuristic >= 3))
-            and legitimacy_score < 0.7
-        )
+        signals: Dict[int, Tuple[int, int, float, bool]] = {}
+        for i, result in enumerate(results):
+            if result is None:
+                flags = _keyword_flags(lowered[i])
+                signals[i] = (
+                    flags,
+                    _heuristic_score(combined[i], lowered[i], flags),
+                    _legitimacy_score(flags),
+                    _LEGIT_RE.search(lowered[i]) is not None,
+                )
+
+        needs_model = [i for i, (_, _, _, legit_override) in signals.items() if not legit_override]
+        probabilities: Dict[int, float] = {}
+        if needs_model and self._ready.wait(MODEL_READY_TIMEOUT_SECONDS):
+            if self._forest is None or not self.vectorizer:
+                self._load_or_train()
+            if not self.vectorizer:
+                raise RuntimeError("Vectorizer not initialized")
+            custom = np.empty((len(needs_model), CUSTOM_FEATURE_COUNT), dtype=np.float32)
+            for row, i in enumerate(needs_model):
+                _custom_feature_row(combined[i], lowered[i], signals[i][0], out=custom[row])
+            tfidf = self.vectorizer.transform([lowered[i] for i in needs_model])
+            features = sp.hstack([tfidf, sp.csr_matrix(custom)], format="csr")
+            probabilities = dict(zip(needs_model, map(float, self._predict_many(features))))
+
+        for i, (_, heuristic, legitimacy_score, legit_override) in signals.items():
+            results[i] = _verdict(
+                combined[i], probabilities.get(i, 0.0), heuristic, legitimacy_score, legit_override
+            )
+        return [result for result in results if result is not None]
+
+    def _analyze_combined(self, combined_text: str) -> Dict:
+        text_l = combined_text.lower()
 
-        if safe_override:
-            scam_confidence = round(min(scam_confidence, 0.15), 3)
-            is_scam = False
-
-        # Extra guard: low-signal messages (no heuristics) need higher ML probability to be scams.
-        if heuristic <= 1 and ml_proba < 0.65:
-            is_scam = False
-            scam_confidence = round(min(scam_confidence, 0.2), 3)
-
-        return {
-            "is_scam": bool(is_scam),
-            "confidence": scam_confidence,
-            "ml_probability": round(ml_proba, 3),
-            "heuristic_score": heuristic,
-            "legitimacy_score": legitimacy_score,
-            "combined_text_used": combined_text,
-        }
+        safe_result = _safe_notification_result(combined_text, text_l)
+        if safe_result is not None:
+            return safe_result
+
+        # One keyword pass feeds both the heuristic score and the feature row.
+        flags = _keyword_flags(text_l)
+        heuristic = _heuristic_score(combined_text, text_l, flags)
+        legitimacy_score = _legitimacy_score(flags)
+
+        # A whitelisted bank notification is never a scam, so it does not need the model.
+        legit_override = _LEGIT_RE.search(text_l) is not None
+        if legit_override or not self._ready.wait(MODEL_READY_TIMEOUT_SECONDS):
+            ml_proba = 0.0
+        else:
+            if self._forest is None or not self.vectorizer:
+                self._load_or_train()
+            custom_row = _custom_feature_row(combined_text, text_l, flags)
+            features = self._vectorize(combined_text, custom_row, text_l)
+            ml_proba = self._predict_proba(features)
+
+        return _verdict(combined_text, ml_proba, heuristic, legitimacy_score, legit_override)
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 """Comprehensive test suite for GUVI Honeypot v2.0."""
 import json
-import time
 from typing import Any, Dict
 
 import requests
@@ -85,7 +84,6 @@ def test_multi_turn_and_callback() -> bool:
             return False
         last_response = resp["json"]
         history.append({"sender": sender, "text": text})
-        time.sleep(0.2)
     intel_present = "extractedIntelligence" in last_response and last_response.get("scamDetected")
     _print(Colors.GREEN if intel_present else Colors.RED, "Callback/intelligence triggered after 4+ messages")
     return intel_present
@@ -119,7 +117,6 @@ def run_all():
                 passed += 1
         except Exception as exc:
             _print(Colors.RED, f"{name} crashed: {exc}")
-        time.sleep(0.2)
     print(f"\n{Colors.BOLD}Summary: {passed}/{len(tests)} tests passed{Colors.RESET}")
 
 
@@ -4,14 +4,22 @@ Test script for GUVI Honeypot system
 Tests various scam scenarios and validates API responses
 """
 
-import requests
+import asyncio
+import contextvars
 import json
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+import httpx
 
 # Configuration
 API_URL = "http://localhost:5000/api/honeypot"
 API_KEY = "guvi_secret_123"
+HEALTH_URL = API_URL.rsplit("/api/", 1)[0] + "/health"
+
+DEFAULT_HEADERS = {"Content-Type": "application/json", "x-api-key": API_KEY}
+MAX_CONCURRENT_TESTS = 8
+READY_TIMEOUT_SECONDS = 10
 
 # ANSI colors for terminal output
 class Colors:
@@ -22,38 +30,42 @@ class Colors:
     RESET = '\033[0m'
     BOLD = '\033[1m'
 
+# Lines from the running test; each test task gets its own buffer
+_output: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("output", default=None)
+
+def emit(text):
+    """Buffer text for the running test, or print it when no test is running"""
+    lines = _output.get()
+    if lines is None:
+        print(text)
+    else:
+        lines.append(text)
+
 def print_header(text):
     """Print a formatted header"""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}")
-    print(f"  {text}")
-    print(f"{'='*60}{Colors.RESET}\n")
+    emit(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}\n  {text}\n{'='*60}{Colors.RESET}\n")
 
 def print_success(text):
     """Print success message"""
-    print(f"{Colors.GREEN}[PASS] {text}{Colors.RESET}")
+    emit(f"{Colors.GREEN}[PASS] {text}{Colors.RESET}")
 
 def print_error(text):
     """Print error message"""
-    print(f"{Colors.RED}[FAIL] {text}{Colors.RESET}")
+    emit(f"{Colors.RED}[FAIL] {text}{Colors.RESET}")
 
 def print_info(text):
     """Print info message"""
-    print(f"{Colors.BLUE}[INFO] {text}{Colors.RESET}")
+    emit(f"{Colors.BLUE}[INFO] {text}{Colors.RESET}")
 
-def test_api(test_name: str, payload: Dict[str, Any]) -> bool:
+async def test_api(client: httpx.AsyncClient, test_name: str, payload: Dict[str, Any]) -> bool:
     """Send test request to API and validate response"""
     
     print_info(f"Testing: {test_name}")
     print_info(f"Payload: {json.dumps(payload, indent=2)}")
     
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": API_KEY
-        }
-        
         start_time = time.time()
-        response = requests.post(API_URL, json=payload, headers=headers, timeout=10)
+        response = await client.post(API_URL, json=payload, timeout=10)
         elapsed = time.time() - start_time
         
         print_info(f"Response Time: {elapsed:.2f}s")
@@ -87,17 +99,17 @@ def test_api(test_name: str, payload: Dict[str, Any]) -> bool:
             print_error("Response is not valid JSON")
             return False
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print_error("Request timeout (10s)")
         return False
-    except requests.exceptions.ConnectionError as e:
+    except httpx.ConnectError as e:
         print_error(f"Connection error: {e}")
         return False
     except Exception as e:
         print_error(f"Unexpected error: {e}")
         return False
 
-def test_api_key_validation():
+async def test_api_key_validation(client: httpx.AsyncClient):
     """Test 1: API Key Validation"""
     print_header("Test 1: API Key Validation")
     
@@ -113,11 +125,7 @@ def test_api_key_validation():
     # Try with invalid key
     print_info("Testing with invalid API key...")
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": "invalid_key_12345"
-        }
-        response = requests.post(API_URL, json=payload, headers=headers, timeout=5)
+        response = await client.post(API_URL, json=payload, headers={"x-api-key": "invalid_key_12345"}, timeout=5)
         
         if response.status_code == 401:
             print_success("Invalid API key correctly rejected (401)")
@@ -129,7 +137,7 @@ def test_api_key_validation():
         print_error(f"Error: {e}")
         return False
 
-def test_high_confidence_scam():
+async def test_high_confidence_scam(client: httpx.AsyncClient):
     """Test 2: High Confidence Scam Detection"""
     print_header("Test 2: High Confidence Scam Detection")
     
@@ -143,9 +151,9 @@ def test_high_confidence_scam():
         "conversationHistory": []
     }
     
-    return test_api("High confidence scam (score >= 4)", payload)
+    return await test_api(client, "High confidence scam (score >= 4)", payload)
 
-def test_medium_confidence_scam():
+async def test_medium_confidence_scam(client: httpx.AsyncClient):
     """Test 3: Medium Confidence Scam with History"""
     print_header("Test 3: Medium Confidence Scam (Score 2-3)")
     
@@ -168,9 +176,9 @@ def test_medium_confidence_scam():
         ]
     }
     
-    return test_api("Medium confidence scam with history", payload)
+    return await test_api(client, "Medium confidence scam with history", payload)
 
-def test_safe_message():
+async def test_safe_message(client: httpx.AsyncClient):
     """Test 4: Safe Message Detection"""
     print_header("Test 4: Safe Message Detection")
     
@@ -184,9 +192,9 @@ def test_safe_message():
         "conversationHistory": []
     }
     
-    return test_api("Safe message detection", payload)
+    return await test_api(client, "Safe message detection", payload)
 
-def test_multi_turn_conversation():
+async def test_multi_turn_conversation(client: httpx.AsyncClient):
     """Test 5: Multi-Turn Conversation Engagement"""
     print_header("Test 5: Multi-Turn Conversation Engagement")
     
@@ -216,8 +224,7 @@ def test_multi_turn_conversation():
         }
         
         try:
-            headers = {"Content-Type": "application/json", "x-api-key": API_KEY}
-            response = requests.post(API_URL, json=payload, headers=headers, timeout=10)
+            response = await client.post(API_URL, json=payload, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -236,7 +243,7 @@ def test_multi_turn_conversation():
     print_success("Multi-turn conversation completed successfully")
     return True
 
-def test_intelligence_extraction():
+async def test_intelligence_extraction(client: httpx.AsyncClient):
     """Test 6: Intelligence Extraction from Scam Messages"""
     print_header("Test 6: Intelligence Extraction")
     
@@ -258,8 +265,7 @@ def test_intelligence_extraction():
     print_info("Testing intelligence extraction with 4+ message history...")
     
     try:
-        headers = {"Content-Type": "application/json", "x-api-key": API_KEY}
-        response = requests.post(API_URL, json=payload, headers=headers, timeout=10)
+        response = await client.post(API_URL, json=payload, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -267,11 +273,13 @@ def test_intelligence_extraction():
             if "extractedIntelligence" in data:
                 intel = data["extractedIntelligence"]
                 print_success("Intelligence extracted:")
-                print(f"  UPI IDs: {intel.get('upiIds', [])}")
-                print(f"  Phone Numbers: {intel.get('phoneNumbers', [])}")
-                print(f"  Phishing Links: {intel.get('phishingLinks', [])}")
-                print(f"  Bank Accounts: {intel.get('bankAccounts', [])}")
-                print(f"  Keywords: {intel.get('suspiciousKeywords', [])[:5]}...")
+                emit(
+                    f"  UPI IDs: {intel.get('upiIds', [])}\n"
+                    f"  Phone Numbers: {intel.get('phoneNumbers', [])}\n"
+                    f"  Phishing Links: {intel.get('phishingLinks', [])}\n"
+                    f"  Bank Accounts: {intel.get('bankAccounts', [])}\n"
+                    f"  Keywords: {intel.get('suspiciousKeywords', [])[:5]}..."
+                )
                 return True
             else:
                 print_error("No intelligence extracted in response")
@@ -284,7 +292,7 @@ def test_intelligence_extraction():
         print_error(f"Error: {e}")
         return False
 
-def test_metadata_handling():
+async def test_metadata_handling(client: httpx.AsyncClient):
     """Test 7: Request with Optional Metadata"""
     print_header("Test 7: Optional Metadata Handling")
     
@@ -303,17 +311,26 @@ def test_metadata_handling():
         }
     }
     
-    return test_api("Request with metadata", payload)
+    return await test_api(client, "Request with metadata", payload)
 
-def main():
+async def wait_for_server(client: httpx.AsyncClient) -> bool:
+    """Poll the health endpoint until the server answers or the timeout passes"""
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while True:
+        try:
+            await client.get(HEALTH_URL, timeout=0.5)
+            return True
+        except httpx.HTTPError:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.1)
+
+async def main():
     """Run all tests"""
     print_header("GUVI Honeypot - Comprehensive Test Suite")
     print_info(f"API URL: {API_URL}")
     print_info("Ensure the Flask server is running before executing tests")
     
-    # Wait a moment for user to prepare
-    time.sleep(1)
-    
     tests = [
         ("API Key Validation", test_api_key_validation),
         ("High Confidence Scam", test_high_confidence_scam),
@@ -325,15 +342,26 @@ def main():
     ]
     
     results = {}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_TESTS)
     
-    for test_name, test_func in tests:
-        try:
-            results[test_name] = test_func()
-        except Exception as e:
-            print_error(f"Test '{test_name}' crashed: {e}")
-            results[test_name] = False
-        
-        time.sleep(0.5)  # Small delay between tests
+    async def run(test_name, test_func, client):
+        # Each test's output is written in one go so concurrent tests don't interleave
+        lines: List[str] = []
+        _output.set(lines)
+        async with semaphore:
+            try:
+                results[test_name] = await test_func(client)
+            except Exception as e:
+                print_error(f"Test '{test_name}' crashed: {e}")
+                results[test_name] = False
+        print("\n".join(lines))
+    
+    # Tests are independent (multi-turn stays sequential inside its own test)
+    limits = httpx.Limits(max_keepalive_connections=16)
+    async with httpx.AsyncClient(headers=DEFAULT_HEADERS, limits=limits) as client:
+        if not await wait_for_server(client):
+            print_error(f"Server not reachable at {HEALTH_URL}")
+        await asyncio.gather(*(run(test_name, test_func, client) for test_name, test_func in tests))
     
     # Print summary
     print_header("Test Summary")
@@ -341,7 +369,8 @@ def main():
     passed = sum(1 for v in results.values() if v)
     total = len(results)
     
-    for test_name, result in results.items():
+    for test_name, _ in tests:
+        result = results[test_name]
         status = f"{Colors.GREEN}PASS{Colors.RESET}" if result else f"{Colors.RED}FAIL{Colors.RESET}"
         print(f"  {status} - {test_name}")
     
@@ -354,7 +383,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print_info("\nTests interrupted by user")
     except Exception as e:
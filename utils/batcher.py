@@ -0,0 +1,83 @@
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class _Pending:
+    __slots__ = ("features", "done", "result", "error")
+
+    def __init__(self, features: sp.csr_matrix) -> None:
+        self.features = features
+        self.done = threading.Event()
+        self.result: float = 0.0
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """Groups single-row predictions from concurrent requests into one model call.
+
+    The first queued row opens a window of ``window_seconds``; rows arriving within it
+    (up to ``max_batch``) are stacked and scored together by ``predict_many``, which
+    returns one probability per row.
+    """
+
+    def __init__(
+        self,
+        predict_many: Callable[[sp.csr_matrix], np.ndarray],
+        window_seconds: float = 0.01,
+        max_batch: int = 32,
+    ) -> None:
+        self._predict_many = predict_many
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, features: sp.csr_matrix) -> float:
+        """Queue one feature row and block until its probability is ready."""
+        self._ensure_worker()
+        item = _Pending(features)
+        self._queue.put(item)
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _ensure_worker(self) -> None:
+        # Started lazily so each gunicorn worker process gets its own thread after fork.
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                probabilities = self._predict_many(sp.vstack([item.features for item in batch], format="csr"))
+                for item, proba in zip(batch, probabilities):
+                    item.result = float(proba)
+            except BaseException as exc:
+                for item in batch:
+                    item.error = exc
+            finally:
+                for item in batch:
+                    item.done.set()
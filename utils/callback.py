@@ -1,30 +1,132 @@
+import atexit
+import logging
+import os
+import queue
 import threading
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-_sent_sessions: set[str] = set()
+logger = logging.getLogger(__name__)
+
+# Sessions that already had their callback queued; oldest entries are evicted past the cap.
+SENT_SESSIONS_MAX = 10_000
+_sent_sessions: "OrderedDict[str, None]" = OrderedDict()
+_sent_lock = threading.Lock()
+
+# Callbacks are posted by a few background workers over a pooled keep-alive session,
+# so one slow endpoint does not hold up the rest of the queue.
+CALLBACK_WORKERS = 4
+_queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+_session = requests.Session()
+# Retries cover connection failures only; POST is not retried once the request was sent.
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.2))
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+_workers: List[threading.Thread] = []
+_worker_lock = threading.Lock()
+_shutdown_registered = False
+# Opt-in coalescing: callbacks to the same URL queued within the window are posted
+# together as {"events": [...]}. Off by default because the GUVI endpoint takes one
+# session result per request.
+BATCH_WINDOW_MS = float(os.getenv("CALLBACK_BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(os.getenv("CALLBACK_BATCH_MAX_SIZE", "100"))
+# Queued callbacks get this long to go out when the process exits.
+_DRAIN_TIMEOUT_SECONDS = 5.0
 
 
 def _post_callback(url: str, payload: Dict) -> None:
     try:
-        resp = requests.post(url, json=payload, timeout=5)
+        resp = _session.post(
+            url, data=orjson.dumps(payload), headers={"Content-Type": "application/json"}, timeout=5
+        )
         if resp.status_code == 200:
-            print(f"[CALLBACK] Status {resp.status_code}")
+            logger.info("Status %s", resp.status_code)
         else:
-            print(f"[CALLBACK] Status {resp.status_code} Body={resp.text[:200]}")
+            logger.warning("Status %s Body=%s", resp.status_code, resp.text[:200])
     except Exception as exc:
-        print(f"[CALLBACK] Failed: {exc}")
+        logger.warning("Failed: %s", exc)
+
+
+def _collect_batch(first: Tuple[str, Dict]) -> List[Tuple[str, Dict]]:
+    batch = [first]
+    deadline = time.monotonic() + BATCH_WINDOW_MS / 1000.0
+    while len(batch) < BATCH_MAX_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _post_batch(batch: List[Tuple[str, Dict]]) -> None:
+    by_url: Dict[str, List[Dict]] = {}
+    for url, payload in batch:
+        by_url.setdefault(url, []).append(payload)
+    for url, payloads in by_url.items():
+        if len(payloads) == 1:
+            _post_callback(url, payloads[0])
+        else:
+            _post_callback(url, {"events": payloads})
+
+
+def _callback_worker() -> None:
+    while True:
+        item = _queue.get()
+        batch = _collect_batch(item) if BATCH_WINDOW_MS > 0 else [item]
+        try:
+            _post_batch(batch)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _shutdown() -> None:
+    deadline = time.monotonic() + _DRAIN_TIMEOUT_SECONDS
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if _queue.unfinished_tasks:
+        logger.warning("Dropping %s pending callbacks at shutdown", _queue.unfinished_tasks)
+    _session.close()
+
+
+def _ensure_worker() -> None:
+    # Started lazily so each gunicorn worker process gets its own threads after fork.
+    global _shutdown_registered
+    with _worker_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        while len(_workers) < CALLBACK_WORKERS:
+            worker = threading.Thread(
+                target=_callback_worker, name=f"callback-worker-{len(_workers)}", daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+        if not _shutdown_registered:
+            # Registered after logging is configured, so it runs before the log listener stops.
+            atexit.register(_shutdown)
+            _shutdown_registered = True
 
 
 def send_callback_async(url: str, payload: Dict, session_id: Optional[str] = None) -> bool:
     """Send callback without blocking the main request."""
     sid = session_id or payload.get("sessionId")
-    if sid and sid in _sent_sessions:
-        return False
     if sid:
-        _sent_sessions.add(sid)
+        with _sent_lock:
+            if sid in _sent_sessions:
+                _sent_sessions.move_to_end(sid)
+                return False
+            _sent_sessions[sid] = None
+            if len(_sent_sessions) > SENT_SESSIONS_MAX:
+                _sent_sessions.popitem(last=False)
 
-    thread = threading.Thread(target=_post_callback, args=(url, payload), daemon=True)
-    thread.start()
+    _ensure_worker()
+    _queue.put((url, payload))
     return True
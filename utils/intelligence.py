@@ -1,56 +1,170 @@
 import re
-from typing import Dict, List
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.keywords import KeywordMatcher
+
+# Accounts: prefer 12-18 digit spans or 4-4-4/4-4-5 grouped forms; avoid 10-digit phones.
+_ACCOUNT_RE = re.compile(r"\b\d{4}-\d{4}-\d{4,5}\b|\b\d{12,18}\b")
+_UPI_RE = re.compile(r"\b[a-zA-Z0-9._-]+@[a-zA-Z0-9.-]+\b")
+_LINK_RE = re.compile(r"https?://\S+")
+# Phones: allow +91 with optional separators and bare 10-digit Indian numbers.
+_PHONE_RE = re.compile(r"\+?91[- ]?\d{10}|\b[6-9]\d{9}\b")
+_DIGIT_RE = re.compile(r"\d")
+
+_SUSPICIOUS_KEYWORDS = (
+    "urgent",
+    "immediately",
+    "blocked",
+    "suspended",
+    "deactivated",
+    "limited",
+    "unusual activity",
+    "verify",
+    "confirm",
+    "update",
+    "click",
+    "login",
+    "respond",
+    "upi",
+    "payment",
+    "transfer",
+    "refund",
+    "reward",
+    "prize",
+    "lottery",
+)
+_SUSPICIOUS_MATCHER = KeywordMatcher(_SUSPICIOUS_KEYWORDS)
+# Nothing shorter than this can match: the shortest keyword is "upi" and the shortest
+# UPI handle ("a@b") is three characters too.
+_MIN_MATCH_LEN = min(3, min(map(len, _SUSPICIOUS_KEYWORDS)))
+
+INTELLIGENCE_FIELDS = ("bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "suspiciousKeywords")
+
+# Findings from history already scanned per session, so each turn only scans new messages.
+# Idle sessions expire after the TTL; past the cap the least recently used are evicted.
+SESSION_TTL_SECONDS = 3600
+SESSION_STATE_MAX = 10_000
+# Sessions whose findings outgrow this many characters, or whose id is longer than the
+# id cap, are not kept; their history is simply rescanned on every turn.
+SESSION_FINDINGS_MAX_CHARS = 8192
+SESSION_ID_MAX_LEN = 256
+_SWEEP_INTERVAL_SECONDS = 60
+_session_state: "OrderedDict[str, Dict]" = OrderedDict()
+_session_lock = threading.Lock()
+_last_sweep = 0.0
 
 
 def _collect_text(history: List[Dict], current_message: str) -> str:
-    full_text = current_message or ""
-    for msg in history:
-        if msg.get("sender") == "scammer":
-            full_text += f" {msg.get('text', '')}"
-    return full_text
+    parts = [current_message or ""]
+    parts.extend(str(msg.get("text") or "") for msg in history if msg.get("sender") == "scammer")
+    return " ".join(parts)
+
+
+def _scan(text: str) -> Dict[str, Set[str]]:
+    found: Dict[str, Set[str]] = {field: set() for field in INTELLIGENCE_FIELDS}
+    if len(text) < _MIN_MATCH_LEN:
+        return found
+    # Cheap checks skip the regexes that cannot match: accounts and phones need a digit.
+    # Each pattern scans the text on its own, since one value can belong to several
+    # fields (the phone number in "9876543210@ybl", the handle inside a link).
+    has_digit = _DIGIT_RE.search(text) is not None
+    if has_digit:
+        found["bankAccounts"].update(_ACCOUNT_RE.findall(text))
+        found["phoneNumbers"].update(_PHONE_RE.findall(text))
+    if "@" in text:
+        found["upiIds"].update(_UPI_RE.findall(text))
+    if "http" in text:
+        found["phishingLinks"].update(_LINK_RE.findall(text))
+    found["suspiciousKeywords"] = _SUSPICIOUS_MATCHER.find(text.lower())
+    return found
+
+
+def _merge(into: Dict[str, Set[str]], found: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    for field, values in found.items():
+        into[field].update(values)
+    return into
+
+
+def _sweep_sessions(now: float) -> None:
+    """Drop idle sessions; caller holds _session_lock."""
+    global _last_sweep
+    if now - _last_sweep < _SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = now
+    expired = [sid for sid, state in _session_state.items() if now - state["touched"] > SESSION_TTL_SECONDS]
+    for sid in expired:
+        del _session_state[sid]
+
 
+def _last_text_key(history: List[Dict]) -> Optional[Tuple[int, int]]:
+    """Cheap fingerprint of the last message, so the state never holds the text itself."""
+    if not history:
+        return None
+    text = str(history[-1].get("text") or "")
+    return len(text), hash(text)
 
-def extract_intelligence(history: List[Dict], current_message: str) -> Dict:
-    """Extract UPI IDs, phone numbers, links, bank accounts, and suspicious keywords."""
+
+def _findings_size(found: Dict[str, Set[str]]) -> int:
+    return sum(len(value) for values in found.values() for value in values)
+
+
+def _history_findings(history: List[Dict], session_id: str) -> Dict[str, Set[str]]:
+    """Findings for the scammer messages in ``history``, scanning only turns not seen before."""
+    with _session_lock:
+        state = _session_state.get(session_id)
+
+    # A shorter history, or a different message where the last scan ended, means the
+    # client restarted or rewrote the conversation; scan it from the start.
+    if (
+        state
+        and state["history_len"] <= len(history)
+        and state["last_text"] == _last_text_key(history[: state["history_len"]])
+    ):
+        seen = state["history_len"]
+        found = {field: set(values) for field, values in state["found"].items()}
+    else:
+        seen = 0
+        found = {field: set() for field in INTELLIGENCE_FIELDS}
+    if len(history) > seen:
+        _merge(found, _scan(_collect_text(history[seen:], "")))
+
+    now = time.monotonic()
+    with _session_lock:
+        if _findings_size(found) > SESSION_FINDINGS_MAX_CHARS:
+            _session_state.pop(session_id, None)
+            return found
+        _session_state[session_id] = {
+            "history_len": len(history),
+            "last_text": _last_text_key(history),
+            "found": found,
+            "touched": now,
+        }
+        _session_state.move_to_end(session_id)
+        if len(_session_state) > SESSION_STATE_MAX:
+            _session_state.popitem(last=False)
+        _sweep_sessions(now)
+    return found
+
+
+def empty_intelligence() -> Dict[str, List[str]]:
+    """Intelligence payload with every field present and empty."""
+    return {field: [] for field in INTELLIGENCE_FIELDS}
+
+
+def extract_intelligence(history: List[Dict], current_message: str, session_id: Optional[str] = None) -> Dict:
+    """Extract UPI IDs, phone numbers, links, bank accounts, and suspicious keywords.
+
+    With a ``session_id``, history scanned on earlier turns is reused and only new
+    messages are scanned.
+    """
     history = history or []
-    full_text = _collect_text(history, current_message)
-    text_l = full_text.lower()
-
-    # Accounts: prefer 12-18 digit spans or 4-4-4/4-4-5 grouped forms; avoid 10-digit phones.
-    bank_accounts = re.findall(r"\b\d{4}-\d{4}-\d{4,5}\b|\b\d{12,18}\b", full_text)
-    upi_ids = re.findall(r"\b[a-zA-Z0-9._-]+@[a-zA-Z0-9.-]+\b", full_text)
-    phishing_links = re.findall(r"https?://[^\s]+", full_text)
-    # Phones: allow +91 with optional separators and bare 10-digit Indian numbers.
-    phone_numbers = re.findall(r"\+?91[- ]?\d{10}|\b[6-9]\d{9}\b", full_text)
-
-    suspicious_keywords_list = [
-        "urgent",
-        "immediately",
-        "blocked",
-        "suspended",
-        "deactivated",
-        "limited",
-        "unusual activity",
-        "verify",
-        "confirm",
-        "update",
-        "click",
-        "login",
-        "respond",
-        "upi",
-        "payment",
-        "transfer",
-        "refund",
-        "reward",
-        "prize",
-        "lottery",
-    ]
-    suspicious_keywords = [kw for kw in suspicious_keywords_list if kw in text_l]
-
-    return {
-        "bankAccounts": sorted(set(bank_accounts)),
-        "upiIds": sorted(set(upi_ids)),
-        "phishingLinks": sorted(set(phishing_links)),
-        "phoneNumbers": sorted(set(phone_numbers)),
-        "suspiciousKeywords": sorted(set(suspicious_keywords)),
-    }
+    # Session ids come straight from the request body; only string ids key the cache.
+    if session_id and isinstance(session_id, str) and len(session_id) <= SESSION_ID_MAX_LEN:
+        found = _merge(_scan(current_message or ""), _history_findings(history, session_id))
+    else:
+        found = _scan(_collect_text(history, current_message))
+
+    return {field: sorted(values) for field, values in found.items()}
@@ -0,0 +1,68 @@
+import re
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Finds every keyword that occurs as a substring of a text in a single pass.
+
+    Uses a pyahocorasick automaton when installed and falls back to one lookahead
+    regex that reports the same set of keywords. Optional per-keyword bit ``flags``
+    let callers fold the matches into one integer with :meth:`find_flags`.
+    """
+
+    def __init__(self, keywords: Iterable[str], flags: Optional[Mapping[str, int]] = None) -> None:
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        self._flags: Dict[str, int] = {kw: (flags or {}).get(kw, 0) for kw in self.keywords}
+        self._automaton: Any = None
+        self._pattern: Optional["re.Pattern[str]"] = None
+        self._prefixes: Dict[str, Tuple[str, ...]] = {}
+        self._prefix_flags: Dict[str, int] = {}
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for kw in self.keywords:
+                automaton.add_word(kw, (kw, self._flags[kw]))
+            automaton.make_automaton()
+            self._automaton = automaton
+            return
+
+        # Longest-first alternation reports the longest keyword starting at each position;
+        # shorter keywords that are prefixes of it ("upi" in "upi pin") are added back.
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        self._prefixes = {
+            kw: tuple(other for other in self.keywords if other != kw and kw.startswith(other))
+            for kw in self.keywords
+        }
+        for kw, prefixes in self._prefixes.items():
+            bits = self._flags[kw]
+            for other in prefixes:
+                bits |= self._flags[other]
+            self._prefix_flags[kw] = bits
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of keywords present in ``text`` (case-sensitive)."""
+        if self._pattern is None:
+            return {kw for _, (kw, _bits) in self._automaton.iter(text)}
+        found: Set[str] = set()
+        for match in self._pattern.finditer(text):
+            kw = match.group(1)
+            found.add(kw)
+            found.update(self._prefixes[kw])
+        return found
+
+    def find_flags(self, text: str) -> int:
+        """Return the OR of the flags of every keyword present in ``text``."""
+        bits = 0
+        if self._pattern is None:
+            for _, (_kw, kw_bits) in self._automaton.iter(text):
+                bits |= kw_bits
+            return bits
+        for match in self._pattern.finditer(text):
+            bits |= self._prefix_flags[match.group(1)]
+        return bits